@@ -1,28 +1,35 @@
 #!/usr/bin/env python3
 import osmium
 import os
+import sys
+from fix_private_roads import fix_way
 
 class OSMHandler(osmium.SimpleHandler):
-    def __init__(self, writer):
+    def __init__(self, writer, fix_roads=False):
         osmium.SimpleHandler.__init__(self)
         self.writer = writer
+        self.fix_roads = fix_roads
 
     def node(self, n):
         self.writer.add_node(n)
 
     def way(self, w):
+        # Poprawki dróg z fix_private_roads nakładane od razu, bez pośredniego pliku XML
+        if self.fix_roads:
+            w, _ = fix_way(w)
         self.writer.add_way(w)
 
     def relation(self, r):
         self.writer.add_relation(r)
 
-def convert_pbf_to_osm_xml(input_pbf_path, output_osm_path):
+def convert_pbf_to_osm_xml(input_pbf_path, output_osm_path, fix_roads=False):
     """
     Konwertuje plik .osm.pbf do formatu .osm (XML) za pomocą PyOsmium.
 
     Args:
         input_pbf_path (str): Ścieżka do wejściowego pliku .osm.pbf.
         output_osm_path (str): Ścieżka do wyjściowego pliku .osm (XML).
+        fix_roads (bool): Czy nałożyć poprawki dróg z fix_private_roads podczas konwersji.
     """
     try:
         # Sprawdzamy czy plik wyjściowy już istnieje i go usuwamy
@@ -34,7 +41,7 @@ def convert_pbf_to_osm_xml(input_pbf_path, output_osm_path):
         writer = osmium.SimpleWriter(output_osm_path)
 
         # Tworzymy handler, który będzie przenosił wszystkie obiekty do writera
-        handler = OSMHandler(writer)
+        handler = OSMHandler(writer, fix_roads)
 
         # Przetwarzamy plik PBF
         handler.apply_file(input_pbf_path)
@@ -52,4 +59,5 @@ def convert_pbf_to_osm_xml(input_pbf_path, output_osm_path):
 if __name__ == "__main__":
     input_file = 'mazowieckie-latest.osm.pbf'
     output_file = 'mazowieckie-latest.osm'
-    convert_pbf_to_osm_xml(input_file, output_file)
\ No newline at end of file
+    # --fix-roads: od razu zapisuje poprawioną mapę (zamiast osobnego przebiegu fix_private_roads.py)
+    convert_pbf_to_osm_xml(input_file, output_file, fix_roads='--fix-roads' in sys.argv[1:])
\ No newline at end of file
@@ -1,16 +1,419 @@
 #!/usr/bin/env python3
 """
 Script to process large OSM files and modify private residential roads to tertiary highways.
-This script uses lxml for efficient XML parsing with low memory usage and ensures valid XML output.
+The OSM XML is scanned as raw bytes: only <tag> elements inside ways that carry a rule key are
+inspected, and everything else is copied unchanged. Any line layout is handled; files with one
+element per line (as written by osmium) can also be split between worker processes.
+.osm.pbf input is processed with osmium directly, skipping XML altogether.
 """
 
 import sys
 import os
+import re
+import mmap
 import time
-from lxml import etree
+import shutil
+import multiprocessing
 
-def process_osm_file(input_file, output_file):
-    """Process OSM file using streaming parsing to ensure valid XML output."""
+# Output file buffer size
+WRITE_BUFFER_SIZE = 4 * 1024 * 1024
+# XML files smaller than this are rewritten in a single process
+PARALLEL_MIN_SIZE = 64 * 1024 * 1024
+
+
+# reczne ubicie sciezki (highway -> construction)
+# 171028660 - czarnomorksa zakret
+# 206528330 - rezedowa, 402
+# 114895531 - Wyszczółki 331
+# _WAYS_KILL_HIGHWAY = frozenset({'506254774', '491365793', '206528330', '114895531'})
+_WAYS_KILL_HIGHWAY = frozenset()
+
+# cholera jasna problem z remontami!
+# Aleja Niepodległości! (oneway tag is dropped)
+_WAYS_KILL_ONEWAY = frozenset({'331762058', '952058010', '116931784', '187536173'})
+
+# NOWY ŚWIAT KURCZAKI - covered by the generic access=private rule below
+# frozenset({'24384574', '306458016', '137020852', '1111601198', '882352736'})
+
+# Generic (k, v) rewrites: None drops the tag (and counts the way as modified),
+# a (k, v) pair is written in place of the original tag
+_KV_REWRITES = {
+    # Skip access=private / access=no tags
+    ('access', 'private'): None,
+    ('access', 'no'): None,
+    # Change highway=residential to highway=tertiary
+    # ('highway', 'residential'): ('highway', 'tertiary'),
+    # change highway=unclassified to highway=residential
+    # ('highway', 'unclassified'): ('highway', 'residential'),
+    # change highway=construction to highway=secondary
+    ('highway', 'construction'): ('highway', 'secondary'),
+}
+
+# Tag keys looked up by the generic rules
+_REWRITE_KEYS = tuple(sorted({k for k, _ in _KV_REWRITES}))
+
+
+def _tag_bytes(k, v):
+    """Render a <tag/> element as raw bytes."""
+    return f'<tag k="{k}" v="{v}"/>'.encode('utf-8')
+
+
+# Actions for a matched tag in the byte-level rewrite; None keeps the tag,
+# any other action is the replacement tag bytes
+_DROP = object()  # drop the tag and count the way as modified (access restrictions)
+_DROP_QUIET = object()  # drop the tag without counting the way (way-specific oneway drop)
+
+# Byte-level views of the rules above, used by the streaming loop
+_B_WAYS_KILL_HIGHWAY = frozenset(way_id.encode('ascii') for way_id in _WAYS_KILL_HIGHWAY)
+_B_WAYS_KILL_ONEWAY = frozenset(way_id.encode('ascii') for way_id in _WAYS_KILL_ONEWAY)
+_B_KV_REWRITES = {
+    (k.encode('utf-8'), v.encode('utf-8')): _DROP if new is None else _tag_bytes(*new)
+    for (k, v), new in _KV_REWRITES.items()
+}
+_B_TAG_HIGHWAY_CONSTRUCTION = _tag_bytes('highway', 'construction')
+
+# Bytes that can separate an element name from its attributes
+_XML_SPACE = b' \t\r\n'
+# Matches the id attribute of a <way> opening tag
+_ID_RE = re.compile(rb'\sid=["\']([^"\']*)')
+# Matches the start of an OSM XML document (optional BOM and whitespace first)
+_XML_START_RE = re.compile(rb'(?:\xef\xbb\xbf)?\s*<(?:\?xml|osm)[\s>]')
+# Matches the whitespace after a tag up to and including the end of its line
+_BLANK_TO_EOL = re.compile(rb'[ \t\r]*\n')
+# Matches the newline before a top-level element line, where the file can be split
+_SPLIT_RE = re.compile(rb'\n[ \t]*<(?:node|way|relation)[\s/>]')
+
+
+def _select_tag_rules():
+    """Build the tag regex for the active rules.
+    
+    Returns (regex, kill_highway, kill_oneway), where the flags tell whether
+    the way-specific override sets are populated. The regex only matches tags
+    whose key some active rule uses, so e.g. oneway tags are not matched while
+    the oneway override set is empty.
+    """
+    kill_highway = bool(_B_WAYS_KILL_HIGHWAY)
+    kill_oneway = bool(_B_WAYS_KILL_ONEWAY)
+    
+    keys = set(_REWRITE_KEYS)
+    if kill_highway:
+        keys.add('highway')
+    if kill_oneway:
+        keys.add('oneway')
+    
+    # Matches a whole <tag k=".." v=".."/> element with a rule key (either quote style)
+    regex = re.compile(
+        rb'<tag\s+k=(["\'])(' + b'|'.join(re.escape(k.encode('utf-8')) for k in sorted(keys))
+        + rb')\1\s+v=(["\'])(.*?)\3\s*/>'
+    )
+    return regex, kill_highway, kill_oneway
+
+
+def rewrite_way_tags(way_id, tags):
+    """Apply the rewrite rules to the (k, v) tags of a way.
+    
+    Returns (new_tags, is_private): new_tags is None when no rule matched,
+    is_private tells whether a generic tag (access restriction) was dropped.
+    """
+    kill_highway = way_id in _WAYS_KILL_HIGHWAY
+    kill_oneway = way_id in _WAYS_KILL_ONEWAY
+    new_tags = []
+    changed = False
+    is_private = False
+    
+    for k, v in tags:
+        # Way-specific overrides first, then generic (k, v) rewrites
+        if kill_highway and k == 'highway':
+            new_tags.append(('highway', 'construction'))
+            changed = True
+        elif kill_oneway and k == 'oneway':
+            changed = True
+        elif (k, v) in _KV_REWRITES:
+            new = _KV_REWRITES[(k, v)]
+            changed = True
+            if new is None:
+                is_private = True
+            else:
+                new_tags.append(new)
+        else:
+            new_tags.append((k, v))
+    
+    return (new_tags if changed else None), is_private
+
+
+def fix_way(w):
+    """Apply the rewrite rules to an osmium way.
+    
+    Returns (way, is_private): way is w itself when no rule matched,
+    otherwise a copy with the rewritten tags.
+    """
+    tags = w.tags
+    get = tags.get
+    # The way id is only needed by way-specific overrides
+    way_id = str(w.id) if _WAYS_KILL_HIGHWAY or _WAYS_KILL_ONEWAY else ''
+    
+    # Look up only the keys the rules care about; most ways are copied as-is
+    if not (any((k, get(k)) in _KV_REWRITES for k in _REWRITE_KEYS)
+            or (way_id in _WAYS_KILL_HIGHWAY and 'highway' in tags)
+            or (way_id in _WAYS_KILL_ONEWAY and 'oneway' in tags)):
+        return w, False
+    
+    new_tags, is_private = rewrite_way_tags(way_id, ((tag.k, tag.v) for tag in tags))
+    return w.replace(tags=new_tags), is_private
+
+
+def _rewrite_range(mm, view, start, end, write, start_time, show_progress=True):
+    """Rewrite the ways in mm[start:end], which must begin outside of a way.
+    
+    The scan jumps between <way> elements with mmap.find and searches each way
+    body with one regex for tags of the active rules, so nodes, relations and
+    untouched ways are never split into lines; they are written out as whole
+    spans of `view` (a memoryview of mm) without copying them into bytes.
+    Progress is printed only when show_progress is set.
+    Returns a (ways processed, ways modified) tuple.
+    """
+    modified_ways = 0
+    total_ways = 0
+    find = mm.find
+    regex, kill_highway, kill_oneway = _select_tag_rules()
+    search = regex.search
+    kv_get = _B_KV_REWRITES.get
+    last = start  # start of the span not written out yet
+    pos = start
+    
+    while True:
+        # Handle way opening (self-closing ways have no children)
+        way_start = find(b'<way', pos, end)
+        if way_start < 0:
+            break
+        gt = find(b'>', way_start, end)
+        if gt < 0:
+            break
+        if mm[way_start + 4] not in _XML_SPACE:
+            # Some other element whose name starts with "way"
+            pos = way_start + 4
+            continue
+        pos = gt + 1
+        
+        total_ways += 1
+        if show_progress and total_ways % 100000 == 0:
+            elapsed = time.time() - start_time
+            print(f"Progress: Processed {total_ways:,} ways in {elapsed:.1f} seconds")
+            print(f"Modified ways so far: {modified_ways}")
+        
+        if mm[gt - 1] == 0x2f:  # '/'
+            continue
+        close = find(b'</way>', pos, end)
+        if close < 0:
+            close = end
+        
+        # Handle tags within ways - only tags with a rule key can match
+        m = search(mm, pos, close)
+        if m is None:
+            pos = close
+            continue
+        
+        # The way id is only needed by way-specific overrides
+        current_way = b''
+        if kill_highway or kill_oneway:
+            id_match = _ID_RE.search(mm, way_start, gt)
+            if id_match is not None:
+                current_way = id_match.group(1)
+        is_private = False
+        
+        while m is not None:
+            # Way-specific overrides first, then generic (k, v) rewrites
+            k = m.group(2)
+            if kill_highway and k == b'highway' and current_way in _B_WAYS_KILL_HIGHWAY:
+                act = _B_TAG_HIGHWAY_CONSTRUCTION
+            elif kill_oneway and k == b'oneway' and current_way in _B_WAYS_KILL_ONEWAY:
+                act = _DROP_QUIET
+            else:
+                act = kv_get((k, m.group(4)))
+            
+            if act is _DROP or act is _DROP_QUIET:
+                # Dropped generic tags (access restrictions) mark the way as modified
+                if act is _DROP:
+                    is_private = True
+                # Drop the whole line when the tag is alone on it, otherwise cut out just the tag
+                nl_before = mm.rfind(b'\n', way_start, m.start())
+                blank_after = _BLANK_TO_EOL.match(mm, m.end(), close)
+                if (nl_before >= 0 and blank_after is not None
+                        and not mm[nl_before + 1:m.start()].strip()):
+                    write(view[last:nl_before + 1])
+                    last = blank_after.end()
+                else:
+                    write(view[last:m.start()])
+                    last = m.end()
+            elif act is not None:
+                # Splice the replacement tag in place of the original one
+                write(view[last:m.start()])
+                write(act)
+                last = m.end()
+            
+            m = search(mm, m.end(), close)
+        
+        # Count modified ways
+        if is_private:
+            modified_ways += 1
+        pos = close
+    
+    # Everything after the last rewrite is copied unchanged
+    write(view[last:end])
+    
+    return total_ways, modified_ways
+
+
+def _rewrite_shard(args):
+    """Worker entry point: rewrite one byte range of the input into its own file."""
+    input_file, start, end, output_file, start_time, show_progress = args
+    with open(input_file, 'rb') as f, \
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, \
+            memoryview(mm) as view, \
+            open(output_file, 'wb', buffering=WRITE_BUFFER_SIZE) as out:
+        return _rewrite_range(mm, view, start, end, out.write, start_time, show_progress)
+
+
+def _append_file(src, dst):
+    """Copy the rest of unbuffered file src to the end of unbuffered file dst.
+    
+    Uses os.copy_file_range so the data stays in the kernel, falling back to
+    shutil.copyfileobj where it is unavailable or unsupported.
+    """
+    if hasattr(os, 'copy_file_range'):
+        try:
+            while os.copy_file_range(src.fileno(), dst.fileno(), WRITE_BUFFER_SIZE):
+                pass
+            return
+        except OSError:
+            # Both file positions have advanced past what was copied, so the fallback resumes there
+            pass
+    shutil.copyfileobj(src, dst, WRITE_BUFFER_SIZE)
+
+
+def _shard_bounds(mm, workers):
+    """Split the file into up to `workers` byte ranges starting at top-level element lines.
+    
+    Boundaries are only placed at <node>, <way> or <relation> lines, so no range
+    starts inside a way and each range can be rewritten independently.
+    """
+    size = len(mm)
+    bounds = [0]
+    for i in range(1, workers):
+        m = _SPLIT_RE.search(mm, max(size * i // workers, bounds[-1]))
+        if m is None:
+            break
+        if m.start() + 1 > bounds[-1]:
+            bounds.append(m.start() + 1)
+    bounds.append(size)
+    return bounds
+
+
+def _process_osm_xml(input_file, output_file, start_time, workers):
+    """Stream OSM XML as raw bytes, rewriting only the affected tags.
+    
+    Large files are split into byte ranges that are rewritten by a pool of
+    worker processes and concatenated in order.
+    Returns a (ways processed, ways modified) tuple.
+    """
+    with open(input_file, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        # The byte scan copies anything it does not recognise, so reject input that is
+        # not OSM XML (e.g. compressed) or is cut short instead of passing it through
+        if _XML_START_RE.match(mm) is None:
+            raise ValueError(f"'{input_file}' is not an OSM XML file (expected <?xml or <osm at the start)")
+        if not mm[-4096:].rstrip().endswith(b'</osm>'):
+            raise ValueError(f"'{input_file}' does not end with </osm>, the file looks truncated")
+        
+        if workers > 1 and len(mm) >= PARALLEL_MIN_SIZE:
+            bounds = _shard_bounds(mm, workers)
+        else:
+            bounds = [0, len(mm)]
+    
+    if len(bounds) == 2:
+        print("Starting OSM stream processing...")
+        return _rewrite_shard((input_file, 0, bounds[1], output_file, start_time, True))
+    
+    shards = len(bounds) - 1
+    parts = [f'{output_file}.part{i}' for i in range(shards)]
+    # Per-worker way counts are not meaningful on their own, so workers stay quiet
+    print(f"Starting OSM stream processing in {shards} worker processes...")
+    try:
+        with multiprocessing.Pool(shards) as pool:
+            results = pool.map(_rewrite_shard, [
+                (input_file, bounds[i], bounds[i + 1], parts[i], start_time, False) for i in range(shards)
+            ])
+        
+        # Concatenate the per-worker outputs in file order, freeing each part once copied
+        with open(output_file, 'wb', buffering=0) as out:
+            for part in parts:
+                with open(part, 'rb', buffering=0) as part_file:
+                    _append_file(part_file, out)
+                os.remove(part)
+    finally:
+        for part in parts:
+            if os.path.exists(part):
+                os.remove(part)
+    
+    return sum(r[0] for r in results), sum(r[1] for r in results)
+
+
+def _process_osm_pbf(input_file, output_file, start_time):
+    """Rewrite ways with osmium; output format follows the output file extension.
+    
+    Returns a (objects processed, ways modified) tuple.
+    """
+    # osmium is only needed for PBF input; the XML path works without it
+    import osmium
+    
+    class FixRoadsHandler(osmium.SimpleHandler):
+        """Copies all objects to the writer, applying the rewrite rules to ways."""
+        
+        def __init__(self, writer, start_time):
+            osmium.SimpleHandler.__init__(self)
+            self.writer = writer
+            self.start_time = start_time
+            self.total_objects = 0
+            self.modified_count = 0
+        
+        def _progress(self):
+            self.total_objects += 1
+            if self.total_objects % 1000000 == 0:
+                elapsed = time.time() - self.start_time
+                print(f"Progress: Processed {self.total_objects:,} objects in {elapsed:.1f} seconds")
+                print(f"Modified ways so far: {self.modified_count}")
+        
+        def node(self, n):
+            self._progress()
+            self.writer.add_node(n)
+        
+        def way(self, w):
+            self._progress()
+            w, is_private = fix_way(w)
+            if is_private:
+                self.modified_count += 1
+            self.writer.add_way(w)
+        
+        def relation(self, r):
+            self._progress()
+            self.writer.add_relation(r)
+    
+    # osmium refuses to overwrite an existing file
+    if os.path.exists(output_file):
+        os.remove(output_file)
+    
+    print("Starting osmium processing...")
+    writer = osmium.SimpleWriter(output_file)
+    handler = FixRoadsHandler(writer, start_time)
+    try:
+        handler.apply_file(input_file)
+    finally:
+        writer.close()
+    
+    return handler.total_objects, handler.modified_count
+
+
+def process_osm_file(input_file, output_file, workers=None):
+    """Process an OSM XML or PBF file, rewriting only the affected way tags."""
     
     # Check if input file exists
     if not os.path.isfile(input_file):
@@ -30,215 +433,27 @@ def process_osm_file(input_file, output_file):
     print(f"Output will be saved to: {output_file}")
     print(f"Input file size: {file_size / (1024*1024):.2f} MB")
     
-    # Count ways that will be modified
-    modified_ways = 0
-    total_elements = 0
     start_time = time.time()
     
     try:
-        # Create a custom handler to process the XML
-        class OSMHandler:
-            def __init__(self, output_file):
-                self.output_file = output_file
-                self.current_way = None
-                self.in_way = False
-                self.is_private = False
-                self.is_residential = False
-                self.modified_count = 0
-                self.depth = 0
-                
-                # Open output file
-                self.out = open(output_file, 'wb')
-                # Write XML declaration
-                self.out.write(b'<?xml version="1.0" encoding="UTF-8"?>\n')
-            
-            def start_element(self, name, attrs):
-                self.depth += 1
-                
-                # Handle root element
-                if self.depth == 1:
-                    self.out.write(f'<{name}'.encode('utf-8'))
-                    for attr_name, attr_value in attrs.items():
-                        self.out.write(f' {attr_name}="{self._escape_attr(attr_value)}"'.encode('utf-8'))
-                    self.out.write(b'>\n')
-                    return
-                
-                # Handle way elements
-                if name == 'way':
-                    self.in_way = True
-                    self.current_way = attrs.get('id', '')
-                    self.is_private = False
-                    self.is_residential = False
-                    
-                    # Write way opening tag with attributes
-                    self.out.write(f'  <{name}'.encode('utf-8'))
-                    for attr_name, attr_value in attrs.items():
-                        self.out.write(f' {attr_name}="{self._escape_attr(attr_value)}"'.encode('utf-8'))
-                    self.out.write(b'>\n')
-                
-                # Handle tags within ways
-                elif self.in_way and name == 'tag':
-                    k = attrs.get('k', '')
-                    v = attrs.get('v', '')
-
-                    # reczne ubicie sciezki
-                    # 171028660 - czarnomorksa zakret
-                    # 206528330 - rezedowa, 402
-                    # 114895531 - Wyszczółki 331
-                    # if self.current_way in ['506254774', '491365793', '206528330', '114895531'] and k == 'highway':
-                    #     self.out.write(f'    <{name} k="highway" v="construction"/>\n'.encode('utf-8'))
-                    #     return 
-
-                    # cholera jasna problem z remontami!
-                    # Aleja Niepodległości! 
-                    if self.current_way in ['331762058', '952058010', '116931784', '187536173'] and k == 'oneway':
-                        return
-                        self.out.write(f'    <{name} k="highway" v="construction"/>\n'.encode('utf-8'))
-                    
-                    # NOWY ŚWIAT KURCZAKI
-                    # if self.current_way in ['24384574', '306458016', '137020852', '137020852', '1111601198', '882352736'] and k == 'access' and v == 'private':
-                    #     self.is_private = True
-                    #     return
-
-                    # Skip access=private tags
-                    if k == 'access' and v == 'private':
-                        self.is_private = True
-                        return  # Skip writing this tag
-
-                    if k == 'access' and v == 'no':
-                        self.is_private = True
-                        return  # Skip writing this tag
-                    
-                    # # Change highway=residential to highway=tertiary
-                    # if k == 'highway' and v == 'residential':
-                    #     self.is_residential = True
-                    #     self.out.write(f'    <{name} k="highway" v="tertiary"/>\n'.encode('utf-8'))
-                    #     return
-
-                    # change highway=unclassified to highway=tertiary
-                    # if k == 'highway' and v == 'unclassified':
-                    #     self.out.write(f'    <{name} k="highway" v="residential"/>\n'.encode('utf-8'))
-                    #     return
-
-                    # change highway=construction to highway=secondary
-                    if k == 'highway' and v == 'construction':
-                        self.out.write(f'    <{name} k="highway" v="secondary"/>\n'.encode('utf-8'))
-                        return    
-                    
-                    # Write other tags normally
-                    self.out.write(f'    <{name}'.encode('utf-8'))
-                    for attr_name, attr_value in attrs.items():
-                        self.out.write(f' {attr_name}="{self._escape_attr(attr_value)}"'.encode('utf-8'))
-                    self.out.write(b'/>\n')
-                
-                # Handle nd references within ways
-                elif self.in_way and name == 'nd':
-                    self.out.write(f'    <{name}'.encode('utf-8'))
-                    for attr_name, attr_value in attrs.items():
-                        self.out.write(f' {attr_name}="{self._escape_attr(attr_value)}"'.encode('utf-8'))
-                    self.out.write(b'/>\n')
-                
-                # Handle all other elements
-                else:
-                    indent = '  ' * (self.depth - 1)
-                    self.out.write(f'{indent}<{name}'.encode('utf-8'))
-                    for attr_name, attr_value in attrs.items():
-                        self.out.write(f' {attr_name}="{self._escape_attr(attr_value)}"'.encode('utf-8'))
-                    self.out.write(b'>\n')
-            
-            def end_element(self, name):
-                # Handle way closing
-                if name == 'way' and self.in_way:
-                    self.in_way = False
-                    self.out.write(b'  </way>\n')
-                    
-                    # Count modified ways
-                    if self.is_private or self.is_residential:
-                        self.modified_count += 1
-                
-                # Handle root element
-                elif self.depth == 1:
-                    self.out.write(f'</{name}>'.encode('utf-8'))
-                
-                # Handle other elements (not way, nd, or tag)
-                elif not (self.in_way and (name == 'nd' or name == 'tag')):
-                    indent = '  ' * (self.depth - 1)
-                    self.out.write(f'{indent}</{name}>\n'.encode('utf-8'))
-                
-                self.depth -= 1
-            
-            def handle_text(self, content):
-                # Handle text content (rare in OSM files)
-                if content and content.strip():
-                    indent = '  ' * self.depth
-                    self.out.write(f'{indent}{self._escape_text(content)}\n'.encode('utf-8'))
-            
-            def close(self):
-                if hasattr(self, 'out') and self.out:
-                    self.out.close()
-            
-            def _escape_attr(self, text):
-                """Escape XML attribute values."""
-                if not isinstance(text, str):
-                    text = str(text)
-                return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;').replace('"', '&quot;')
-            
-            def _escape_text(self, text):
-                """Escape XML text content."""
-                if not isinstance(text, str):
-                    text = str(text)
-                return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
-        
-        # Create our handler
-        handler = OSMHandler(output_file)
-        
-        # Use iterparse for streaming processing
-        print("Starting XML parsing...")
-        context = etree.iterparse(input_file, events=('start', 'end'))
-        
-        # Process the XML file
-        for i, (event, elem) in enumerate(context):
-            # Update element counter and show progress
-            if event == 'start':
-                total_elements += 1
-                if total_elements % 100000 == 0:
-                    elapsed = time.time() - start_time
-                    print(f"Progress: Processed {total_elements:,} elements in {elapsed:.1f} seconds")
-                    print(f"Modified ways so far: {handler.modified_count}")
-            
-            # Process the element
-            if event == 'start':
-                # Convert lxml Element to attributes dict
-                attrs = dict(elem.attrib)
-                handler.start_element(elem.tag, attrs)
-                
-                # Handle text content
-                if elem.text and elem.text.strip():
-                    handler.handle_text(elem.text)
-            
-            elif event == 'end':
-                handler.end_element(elem.tag)
-                
-                # Clear element to save memory
-                elem.clear()
-                # Also eliminate now-empty references from the root node to elem
-                while elem.getprevious() is not None:
-                    del elem.getparent()[0]
-        
-        # Close the handler
-        handler.close()
-        
-        # Update modified_ways count
-        modified_ways = handler.modified_count
+        # PBF goes through osmium, anything else is treated as OSM XML
+        if input_file.endswith('.pbf'):
+            total_items, modified_ways = _process_osm_pbf(input_file, output_file, start_time)
+            unit = 'objects'
+        else:
+            total_items, modified_ways = _process_osm_xml(input_file, output_file, start_time, workers or os.cpu_count() or 1)
+            unit = 'ways'
+            if total_items == 0:
+                print(f"Warning: no ways found in '{input_file}'")
         
         # Report statistics
         elapsed_time = time.time() - start_time
         print("\nProcessing complete!")
         print("Statistics:")
-        print(f"  - Total elements processed: {total_elements:,}")
+        print(f"  - Total {unit} processed: {total_items:,}")
         print(f"  - Ways modified: {modified_ways}")
         print(f"  - Processing time: {elapsed_time:.2f} seconds")
-        print(f"  - Processing speed: {total_elements / elapsed_time:.2f} elements/second")
+        print(f"  - Processing speed: {total_items / elapsed_time:.2f} {unit}/second")
         print(f"  - Input file size: {file_size / (1024*1024):.2f} MB")
         print(f"  - Output file size: {os.path.getsize(output_file) / (1024*1024):.2f} MB")
         
@@ -252,13 +467,14 @@ def process_osm_file(input_file, output_file):
 
 if __name__ == "__main__":
     if len(sys.argv) < 3:
-        print(f"Usage: {sys.argv[0]} <input_osm_file> <output_osm_file>")
+        print(f"Usage: {sys.argv[0]} <input_osm_file> <output_osm_file> [workers]")
         sys.exit(1)
     
     input_file = sys.argv[1]
     output_file = sys.argv[2]
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else None
     
-    if process_osm_file(input_file, output_file):
+    if process_osm_file(input_file, output_file, workers):
         print("OSM file processing completed successfully.")
     else:
         print("OSM file processing failed.")
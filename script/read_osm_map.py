@@ -3,68 +3,162 @@
 Skrypt do analizy danych OSM w formacie XML i znajdowania połączonych elementów ulic
 """
 
-import xml.etree.ElementTree as ET
-from collections import defaultdict
-import sys
+from lxml import etree
+from itertools import chain
+from array import array
 import argparse
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:
+    # Bez numby jądra działają jako zwykły Python - wolniej, ale z tym samym wynikiem
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+# Wyrażenia XPath kompilowane raz, poza pętlą po drogach
+_ND_REFS = etree.XPath('./nd/@ref', smart_strings=False)
+_TAGS = etree.XPath('./tag')
 
 def parse_osm_file(file_path):
     """Parsuje plik OSM XML i zwraca słowniki z węzłami i drogami"""
     print(f"Parsowanie pliku OSM: {file_path}")
     
-    # Słowniki do przechowywania danych
-    nodes = {}  # id_węzła -> (lat, lon)
-    ways = {}   # id_drogi -> lista id_węzłów
-    way_tags = {}  # id_drogi -> słownik tagów
-    
-    # Parsowanie pliku XML
-    tree = ET.parse(file_path)
-    root = tree.getroot()
-    
-    # Zbieranie węzłów
-    for node in root.findall('./node'):
-        node_id = node.get('id')
-        lat = float(node.get('lat'))
-        lon = float(node.get('lon'))
-        nodes[node_id] = (lat, lon)
-    
-    # Zbieranie dróg
-    for way in root.findall('./way'):
-        way_id = way.get('id')
-        nd_refs = []
-        tags = {}
-        
-        # Zbieranie referencji do węzłów
-        for nd in way.findall('./nd'):
-            nd_refs.append(nd.get('ref'))
-        
-        # Zbieranie tagów
-        for tag in way.findall('./tag'):
-            k = tag.get('k')
-            v = tag.get('v')
-            tags[k] = v
+    # Struktury do przechowywania danych
+    # Identyfikatory są trzymane jako int - mniej pamięci niż str i tańsze haszowanie
+    # Węzły trafiają do tablic typowanych (8 bajtów na wartość, bez obiektów Pythona)
+    node_ids = array('q')
+    node_lats = array('d')
+    node_lons = array('d')
+    ways = {}   # id_drogi (int) -> lista id_węzłów (int)
+    way_tags = {}  # id_drogi (int) -> słownik tagów
+    
+    # Strumieniowe parsowanie pliku XML - drzewo nie jest trzymane w pamięci
+    # Bez pustych węzłów tekstowych (wcięcia), bez limitów libxml2 dla dużych plików
+    # i bez rozwijania encji - OSM ich nie używa; bez słownika atrybutów id
+    # (collect_ids) - OSM nie korzysta z xml:id, a przy milionach elementów to zbędny koszt
+    context = etree.iterparse(
+        file_path,
+        events=('end',),
+        tag=('node', 'way', 'relation'),
+        remove_blank_text=True,
+        huge_tree=True,
+        recover=False,
+        resolve_entities=False,
+        collect_ids=False,
+    )
+    
+    for event, elem in context:
+        if elem.tag == 'node':
+            # Zbieranie węzłów
+            get = elem.get
+            node_ids.append(int(get('id')))
+            node_lats.append(float(get('lat')))
+            node_lons.append(float(get('lon')))
+        elif elem.tag == 'way':
+            # Zbieranie dróg - referencje do węzłów i tagi przez prekompilowane XPath
+            nd_refs = list(map(int, _ND_REFS(elem)))
+            tags = {tag.get('k'): tag.get('v') for tag in _TAGS(elem)}
+            
+            way_id = int(elem.get('id'))
+            ways[way_id] = nd_refs
+            way_tags[way_id] = tags
         
-        ways[way_id] = nd_refs
-        way_tags[way_id] = tags
+        # Relacje nie są potrzebne - trafiają do filtra tylko po to, żeby zostały wyczyszczone
+        # Zwolnienie pamięci po przetworzonym elemencie
+        elem.clear()
+        while elem.getprevious() is not None:
+            del elem.getparent()[0]
+    
+    # Węzły jako struktura tablic (SoA): posortowane id oraz równoległe lat/lon
+    nodes = (
+        np.frombuffer(node_ids, dtype=np.int64),
+        np.frombuffer(node_lats, dtype=np.float64),
+        np.frombuffer(node_lons, dtype=np.float64),
+    )
+    ids = nodes[0]
+    if len(ids) > 1 and np.any(ids[1:] < ids[:-1]):
+        order = np.argsort(ids, kind='stable')
+        nodes = tuple(column[order] for column in nodes)
     
     return nodes, ways, way_tags
 
 def build_node_to_ways_index(ways):
-    """Buduje indeks węzłów do dróg (które drogi zawierają dany węzeł)"""
-    node_to_ways = defaultdict(list)
+    """
+    Buduje indeks węzłów do dróg (które drogi zawierają dany węzeł)
+    w układzie CSR: (node_ids, indptr, way_ids) - drogi węzła node_ids[i]
+    to way_ids[indptr[i]:indptr[i + 1]]
+    """
+    # Spłaszczenie referencji wszystkich dróg wraz z id drogi dla każdej z nich
+    lengths = np.fromiter((len(node_refs) for node_refs in ways.values()), dtype=np.int64, count=len(ways))
+    flat_refs = np.fromiter(chain.from_iterable(ways.values()), dtype=np.int64, count=int(lengths.sum()))
+    flat_ways = np.repeat(np.fromiter(ways.keys(), dtype=np.int64, count=len(ways)), lengths)
+    
+    # Stopnie węzłów -> indptr, a stabilne sortowanie rozprasza drogi w kolejności wystąpienia
+    node_ids, inverse, degrees = np.unique(flat_refs, return_inverse=True, return_counts=True)
+    indptr = np.zeros(len(node_ids) + 1, dtype=np.int64)
+    np.cumsum(degrees, out=indptr[1:])
+    way_ids = flat_ways[np.argsort(inverse, kind='stable')]
+    
+    return node_ids, indptr, way_ids
+
+def _node_indices(node_refs, node_ids):
+    """Zamienia id węzłów na pozycje w posortowanym node_ids (-1 dla nieznanych)"""
+    refs = np.asarray(node_refs, dtype=np.int64)
+    if not len(node_ids):
+        return np.full(len(refs), -1, dtype=np.int64)
+    
+    idx = np.minimum(np.searchsorted(node_ids, refs), len(node_ids) - 1)
+    return np.where(node_ids[idx] == refs, idx, -1)
+
+@njit(cache=True)
+def _neighbour_ways(node_idx, exclude_way, indptr, way_ids):
+    """
+    Dla kolejnych węzłów zwraca pary (pozycja węzła, id drogi) dróg przechodzących
+    przez te węzły, z pominięciem exclude_way - w kolejności z indeksu CSR
+    """
+    total = 0
+    for i in range(len(node_idx)):
+        n = node_idx[i]
+        if n >= 0:
+            total += indptr[n + 1] - indptr[n]
     
-    for way_id, node_refs in ways.items():
-        for node_ref in node_refs:
-            node_to_ways[node_ref].append(way_id)
+    positions = np.empty(total, dtype=np.int64)
+    neighbours = np.empty(total, dtype=np.int64)
+    count = 0
+    for i in range(len(node_idx)):
+        n = node_idx[i]
+        if n < 0:
+            continue
+        for k in range(indptr[n], indptr[n + 1]):
+            w = way_ids[k]
+            if w != exclude_way:
+                positions[count] = i
+                neighbours[count] = w
+                count += 1
     
-    return node_to_ways
+    return positions[:count], neighbours[:count]
 
-def find_ways_by_name(street_name, way_tags):
+def get_neighbour_ways(way_id, node_refs, node_to_ways):
+    """Zwraca pary (id węzła, id drogi) dla innych dróg przechodzących przez podane węzły"""
+    node_ids, indptr, way_ids = node_to_ways
+    positions, neighbours = _neighbour_ways(_node_indices(node_refs, node_ids), way_id, indptr, way_ids)
+    
+    return [(node_refs[pos], neighbour) for pos, neighbour in zip(positions.tolist(), neighbours.tolist())]
+
+def build_name_index(way_tags):
+    """Buduje słownik id_drogi -> nazwa ('' gdy brak), liczony raz po parsowaniu"""
+    return {way_id: tags.get('name', '') for way_id, tags in way_tags.items()}
+
+def find_ways_by_name(street_name, name_of):
     """Znajduje wszystkie drogi o podanej nazwie"""
     matching_ways = []
+    wanted = street_name.lower()
     
-    for way_id, tags in way_tags.items():
-        if tags.get('name', '').lower() == street_name.lower():
+    for way_id, name in name_of.items():
+        if name.lower() == wanted:
             matching_ways.append(way_id)
     
     return matching_ways
@@ -73,15 +167,24 @@ def get_way_nodes_with_coords(way_id, ways, nodes):
     """Zwraca listę węzłów drogi wraz z ich współrzędnymi"""
     result = []
     way_nodes = ways.get(way_id, [])
+    node_ids, node_lats, node_lons = nodes
     
-    for node_ref in way_nodes:
-        if node_ref in nodes:
-            lat, lon = nodes[node_ref]
-            result.append({
-                'node_id': node_ref,
-                'lat': lat,
-                'lon': lon
-            })
+    if not way_nodes:
+        return result
+    
+    # Wyszukiwanie binarne wszystkich węzłów drogi w posortowanych id naraz
+    idx = _node_indices(way_nodes, node_ids)
+    found = idx >= 0
+    found_refs = [node_ref for node_ref, is_found in zip(way_nodes, found.tolist()) if is_found]
+    lats = node_lats[idx[found]].tolist()
+    lons = node_lons[idx[found]].tolist()
+    
+    for node_ref, lat, lon in zip(found_refs, lats, lons):
+        result.append({
+            'node_id': node_ref,
+            'lat': lat,
+            'lon': lon
+        })
     
     return result
 
@@ -92,17 +195,13 @@ def find_connected_ways(way_id, ways, node_to_ways):
     # Pobierz węzły dla danej drogi
     way_nodes = ways.get(way_id, [])
     
-    # Sprawdź każdy węzeł w drodze
-    for node_ref in way_nodes:
-        # Znajdź wszystkie drogi, które zawierają ten węzeł
-        for connected_way_id in node_to_ways.get(node_ref, []):
-            # Nie dodawaj samej siebie
-            if connected_way_id != way_id:
-                connected_ways.add(connected_way_id)
+    # Znajdź wszystkie inne drogi, które zawierają węzły tej drogi
+    for node_ref, connected_way_id in get_neighbour_ways(way_id, way_nodes, node_to_ways):
+        connected_ways.add(connected_way_id)
     
     return connected_ways
 
-def find_next_street_segments(way_id, ways, node_to_ways, way_tags):
+def find_next_street_segments(way_id, ways, node_to_ways, name_of):
     """
     Znajduje segmenty ulicy, które mogą być kontynuacją danej ulicy
     Sprawdza węzły końcowe i nazwy ulic
@@ -115,31 +214,28 @@ def find_next_street_segments(way_id, ways, node_to_ways, way_tags):
         return result
     
     # Pobierz nazwę ulicy
-    street_name = way_tags.get(way_id, {}).get('name', '')
+    street_name = name_of.get(way_id, '')
     
     # Sprawdź węzły końcowe (pierwszy i ostatni)
     end_nodes = [way_nodes[0], way_nodes[-1]]
     
-    for node_ref in end_nodes:
-        # Znajdź wszystkie drogi, które zawierają ten węzeł końcowy
-        for connected_way_id in node_to_ways.get(node_ref, []):
-            # Nie dodawaj samej siebie
-            if connected_way_id != way_id:
-                # Sprawdź, czy nazwa ulicy jest taka sama (jeśli istnieje)
-                connected_name = way_tags.get(connected_way_id, {}).get('name', '')
-                
-                # Jeśli nazwa jest taka sama lub brak nazwy, to prawdopodobnie kontynuacja
-                if not street_name or not connected_name or street_name == connected_name:
-                    result.append({
-                        'way_id': connected_way_id,
-                        'name': connected_name,
-                        'shared_node': node_ref,
-                        'is_same_name': street_name == connected_name
-                    })
+    # Znajdź wszystkie inne drogi, które zawierają węzły końcowe
+    for node_ref, connected_way_id in get_neighbour_ways(way_id, end_nodes, node_to_ways):
+        # Sprawdź, czy nazwa ulicy jest taka sama (jeśli istnieje)
+        connected_name = name_of[connected_way_id]
+        
+        # Jeśli nazwa jest taka sama lub brak nazwy, to prawdopodobnie kontynuacja
+        if not street_name or not connected_name or street_name == connected_name:
+            result.append({
+                'way_id': connected_way_id,
+                'name': connected_name,
+                'shared_node': node_ref,
+                'is_same_name': street_name == connected_name
+            })
     
     return result
 
-def find_intersecting_streets(way_id, ways, node_to_ways, way_tags):
+def find_intersecting_streets(way_id, ways, node_to_ways, name_of):
     """Znajduje ulice przecinające daną ulicę (różne nazwy)"""
     result = []
     
@@ -149,24 +245,20 @@ def find_intersecting_streets(way_id, ways, node_to_ways, way_tags):
         return result
     
     # Pobierz nazwę ulicy
-    street_name = way_tags.get(way_id, {}).get('name', '')
+    street_name = name_of.get(way_id, '')
     
     # Sprawdź każdy węzeł w drodze (nie tylko końcowe)
-    for node_ref in way_nodes:
-        # Znajdź wszystkie drogi, które zawierają ten węzeł
-        for connected_way_id in node_to_ways.get(node_ref, []):
-            # Nie dodawaj samej siebie
-            if connected_way_id != way_id:
-                # Sprawdź, czy nazwa ulicy jest inna
-                connected_name = way_tags.get(connected_way_id, {}).get('name', '')
-                
-                # Jeśli nazwy są różne i obie istnieją, to prawdopodobnie przecięcie
-                if street_name and connected_name and street_name != connected_name:
-                    result.append({
-                        'way_id': connected_way_id,
-                        'name': connected_name,
-                        'shared_node': node_ref
-                    })
+    for node_ref, connected_way_id in get_neighbour_ways(way_id, way_nodes, node_to_ways):
+        # Sprawdź, czy nazwa ulicy jest inna
+        connected_name = name_of[connected_way_id]
+        
+        # Jeśli nazwy są różne i obie istnieją, to prawdopodobnie przecięcie
+        if street_name and connected_name and street_name != connected_name:
+            result.append({
+                'way_id': connected_way_id,
+                'name': connected_name,
+                'shared_node': node_ref
+            })
     
     return result
 
@@ -178,8 +270,11 @@ def analyze_street_by_name(street_name, osm_file):
     # Buduj indeks węzłów do dróg
     node_to_ways = build_node_to_ways_index(ways)
     
+    # Buduj indeks nazw dróg
+    name_of = build_name_index(way_tags)
+    
     # Znajdź wszystkie drogi o podanej nazwie
-    matching_ways = find_ways_by_name(street_name, way_tags)
+    matching_ways = find_ways_by_name(street_name, name_of)
     
     if not matching_ways:
         print(f"\nNie znaleziono ulic o nazwie '{street_name}'")
@@ -192,8 +287,9 @@ def analyze_street_by_name(street_name, osm_file):
         print(f"\n--- Segment {i+1}/{len(matching_ways)} (ID: {way_id}) ---")
         
         # Informacje o segmencie
-        highway_type = way_tags[way_id].get('highway', 'brak')
-        surface = way_tags[way_id].get('surface', 'brak')
+        tags = way_tags[way_id]
+        highway_type = tags.get('highway', 'brak')
+        surface = tags.get('surface', 'brak')
         way_nodes = ways.get(way_id, [])
         
         print(f"Typ drogi: {highway_type}")
@@ -207,7 +303,7 @@ def analyze_street_by_name(street_name, osm_file):
             print(f"  {j+1}. ID: {node_data['node_id']}, Współrzędne: ({node_data['lat']}, {node_data['lon']})")
         
         # Znajdź kontynuacje ulicy
-        next_segments = find_next_street_segments(way_id, ways, node_to_ways, way_tags)
+        next_segments = find_next_street_segments(way_id, ways, node_to_ways, name_of)
         if next_segments:
             print("\nKontynuacje ulicy:")
             for segment in next_segments:
@@ -215,7 +311,7 @@ def analyze_street_by_name(street_name, osm_file):
                 print(f"  - Droga {segment['way_id']}: {segment['name']} (węzeł wspólny: {segment['shared_node']}, {same_name_info})")
         
         # Znajdź przecinające się ulice
-        intersections = find_intersecting_streets(way_id, ways, node_to_ways, way_tags)
+        intersections = find_intersecting_streets(way_id, ways, node_to_ways, name_of)
         if intersections:
             print("\nUlice przecinające:")
             for intersection in intersections:
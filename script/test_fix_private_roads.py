@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Checks for the raw-bytes OSM XML rewrite in fix_private_roads.
+Run with: python -m unittest test_fix_private_roads
+"""
+
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import fix_private_roads
+
+
+class RewriteXmlTest(unittest.TestCase):
+
+    def rewrite(self, xml):
+        with tempfile.TemporaryDirectory() as tmp:
+            input_file = os.path.join(tmp, 'in.osm')
+            output_file = os.path.join(tmp, 'out.osm')
+            with open(input_file, 'wb') as f:
+                f.write(xml)
+            _, modified = fix_private_roads._process_osm_xml(input_file, output_file, time.time(), 1)
+            with open(output_file, 'rb') as f:
+                return f.read(), modified
+
+    def test_tag_lines(self):
+        out, modified = self.rewrite(
+            b'<osm>\n'
+            b'  <way id="10">\n'
+            b'    <tag k="access" v="private"/>\n'
+            b'    <tag k="name" v="A"/>\n'
+            b'    <tag k="highway" v="construction"/>\n'
+            b'  </way>\n'
+            b'</osm>\n'
+        )
+        self.assertEqual(out,
+            b'<osm>\n'
+            b'  <way id="10">\n'
+            b'    <tag k="name" v="A"/>\n'
+            b'    <tag k="highway" v="secondary"/>\n'
+            b'  </way>\n'
+            b'</osm>\n'
+        )
+        self.assertEqual(modified, 1)
+
+    def test_tags_on_way_line(self):
+        out, modified = self.rewrite(
+            b'<osm>\n'
+            b'  <way id="10"><tag k="access" v="private"/>\n'
+            b'    <tag k="name" v="A"/>\n'
+            b'  </way>\n'
+            b'</osm>\n'
+        )
+        self.assertEqual(out,
+            b'<osm>\n'
+            b'  <way id="10">\n'
+            b'    <tag k="name" v="A"/>\n'
+            b'  </way>\n'
+            b'</osm>\n'
+        )
+        self.assertEqual(modified, 1)
+
+    def test_single_line_file(self):
+        out, modified = self.rewrite(
+            b'<osm><way id="10"><nd ref="1"/><tag k="access" v="no"/><tag k="name" v="A"/>'
+            b'<tag k="highway" v="construction"/></way><way id="11"><tag k="name" v="B"/></way></osm>'
+        )
+        self.assertEqual(out,
+            b'<osm><way id="10"><nd ref="1"/><tag k="name" v="A"/>'
+            b'<tag k="highway" v="secondary"/></way><way id="11"><tag k="name" v="B"/></way></osm>'
+        )
+        self.assertEqual(modified, 1)
+
+    def test_tags_sharing_a_line(self):
+        out, _ = self.rewrite(
+            b'<osm>\n'
+            b'  <way id="10">\n'
+            b'    <tag k="access" v="no"/> <tag k="name" v="A"/>\n'
+            b'  </way>\n'
+            b'</osm>\n'
+        )
+        self.assertEqual(out,
+            b'<osm>\n'
+            b'  <way id="10">\n'
+            b'     <tag k="name" v="A"/>\n'
+            b'  </way>\n'
+            b'</osm>\n'
+        )
+
+    def test_way_attributes_on_separate_lines(self):
+        out, modified = self.rewrite(
+            b'<osm>\n'
+            b'<way\n  id="10"\n  version="1"><tag k="highway" v="construction"/></way>\n'
+            b'</osm>\n'
+        )
+        self.assertEqual(out,
+            b'<osm>\n'
+            b'<way\n  id="10"\n  version="1"><tag k="highway" v="secondary"/></way>\n'
+            b'</osm>\n'
+        )
+        self.assertEqual(modified, 0)
+
+    def test_rejects_non_xml_input(self):
+        with self.assertRaises(ValueError):
+            self.rewrite(b'\x1f\x8b\x08\x00' + b'\x00' * 64)
+
+    def test_rejects_truncated_input(self):
+        with self.assertRaises(ValueError):
+            self.rewrite(b'<?xml version="1.0"?>\n<osm version="0.6">\n  <way id="10">\n    <tag k="acc')
+
+    def test_accepts_bom_and_leading_whitespace(self):
+        xml = b'\xef\xbb\xbf\n<osm version="0.6">\n</osm>\n'
+        self.assertEqual(self.rewrite(xml), (xml, 0))
+
+
+def _sample_osm(ways):
+    """An osmium-style OSM file with one element per line and a mix of rule tags."""
+    lines = [b'<?xml version="1.0" encoding="UTF-8"?>', b'<osm version="0.6" generator="test">']
+    for i in range(ways):
+        lines.append(b'  <node id="%d" lat="52.%d" lon="21.%d"/>' % (i, i, i))
+    for i in range(ways):
+        lines.append(b'  <way id="%d" version="1">' % (1000 + i))
+        lines.append(b'    <nd ref="%d"/>' % i)
+        if i % 3 == 0:
+            lines.append(b'    <tag k="access" v="private"/>')
+        if i % 5 == 0:
+            lines.append(b'    <tag k="highway" v="construction"/>')
+        lines.append(b'    <tag k="name" v="Ulica %d"/>' % i)
+        lines.append(b'  </way>')
+    lines.append(b'  <relation id="1"><member type="way" ref="1000" role=""/></relation>')
+    lines.append(b'</osm>')
+    return b'\n'.join(lines) + b'\n'
+
+
+class ParallelRewriteTest(unittest.TestCase):
+
+    def rewrite(self, xml, workers):
+        """Rewrite xml with the given worker count; returns (output, counts, leftover files)."""
+        with tempfile.TemporaryDirectory() as tmp:
+            input_file = os.path.join(tmp, 'in.osm')
+            output_file = os.path.join(tmp, 'out.osm')
+            with open(input_file, 'wb') as f:
+                f.write(xml)
+            with mock.patch.object(fix_private_roads, 'PARALLEL_MIN_SIZE', 0):
+                counts = fix_private_roads._process_osm_xml(input_file, output_file, time.time(), workers)
+            with open(output_file, 'rb') as f:
+                return f.read(), counts, sorted(os.listdir(tmp))
+
+    def test_matches_single_process(self):
+        xml = _sample_osm(300)
+        expected, expected_counts, _ = self.rewrite(xml, 1)
+        self.assertEqual(expected_counts, (300, 100))
+        for workers in (2, 3, 4, 7, 16):
+            with self.subTest(workers=workers):
+                out, counts, files = self.rewrite(xml, workers)
+                self.assertEqual(out, expected)
+                self.assertEqual(counts, expected_counts)
+                self.assertEqual(files, ['in.osm', 'out.osm'])
+
+    def test_copy_fallback(self):
+        xml = _sample_osm(100)
+        expected, _, _ = self.rewrite(xml, 1)
+        with mock.patch.object(fix_private_roads.os, 'copy_file_range', side_effect=OSError, create=True):
+            out, _, files = self.rewrite(xml, 4)
+        self.assertEqual(out, expected)
+        self.assertEqual(files, ['in.osm', 'out.osm'])
+
+
+class ShardBoundsTest(unittest.TestCase):
+
+    def test_bounds_start_at_element_lines(self):
+        xml = _sample_osm(50)
+        bounds = fix_private_roads._shard_bounds(xml, 4)
+        self.assertEqual(bounds[0], 0)
+        self.assertEqual(bounds[-1], len(xml))
+        self.assertEqual(bounds, sorted(set(bounds)))
+        for bound in bounds[1:-1]:
+            self.assertEqual(xml[bound - 1:bound], b'\n')
+            self.assertRegex(xml[bound:bound + 16], rb'^\s*<(node|way|relation)[\s/>]')
+
+    def test_single_line_file(self):
+        xml = _sample_osm(50).replace(b'\n', b'')
+        self.assertEqual(fix_private_roads._shard_bounds(xml, 4), [0, len(xml)])
+
+
+if __name__ == "__main__":
+    unittest.main()